@@ -0,0 +1,245 @@
+"""
+Analyse WAV files in bulk, without loading each one fully into memory.
+
+Each file is memory-mapped and read in blocks, to get its duration, peak and RMS level, number of clipped samples,
+silence ratio, and number of speech segments (using `PhraseDetector`, the same audio power metric and phrase rules as `SpeechProcessor`).
+Files are spread across a pool of processes, and the results are written to CSV or JSON Lines.
+
+Usage: `python audio_analysis.py DIRECTORY [DIRECTORY ...] -o results.csv [--recursive] [--workers N]`
+"""
+
+from os import path, walk, listdir
+from concurrent.futures import ProcessPoolExecutor
+from math import log10, sqrt
+import argparse
+import struct
+import json
+import csv
+import sys
+import numpy as np
+
+# phrase detection defaults (the same as `SpeechProcessor`)
+AUDIO_THRESHOLD = 675                               # audio power (in 16 bit sample units) above which a chunk counts as sound
+MINIMUM_PHRASE_LENGTH = 0.3                         # in seconds
+CHUNKS_PER_SECOND = 5
+
+BLOCK_SECONDS = 10                                  # how much audio is read from the memory map at a time
+
+FIELDS = ('file', 'duration', 'sample_rate', 'channels', 'bit_depth', 'peak_dbfs', 'rms_dbfs', 'clipped_samples', 'silence_ratio', 'speech_segments', 'error')
+
+#-------------------------------
+# audio power
+
+def get_audio_power(samples, axis:int=None):
+    """
+    Get the power of a chunk of audio samples (in int16 units), as the range between its smallest and largest sample.
+    If `axis` is given, get the power of every chunk along that axis at once (ex: `axis=1` for a 2D array with one chunk per row).
+    """
+    if axis is None:
+        return abs(int(np.max(samples)) - int(np.min(samples)))
+    return np.abs(np.max(samples, axis=axis).astype(np.int64) - np.min(samples, axis=axis).astype(np.int64))
+
+class PhraseDetector:
+    """
+    The phrase detection rules used by `SpeechProcessor`, and to count speech segments in `analyse_wav_file`.
+
+    A phrase is made of consecutive chunks with an audio power above `threshold`, and ends at the next chunk below it
+    (which is included in the phrase). Phrases with fewer than `minimum_chunks` loud chunks are thrown away.
+    """
+    def __init__(self, threshold:int=AUDIO_THRESHOLD, minimum_chunks:int=round(MINIMUM_PHRASE_LENGTH * CHUNKS_PER_SECOND)):
+        self.threshold = threshold
+        self.minimum_chunks = minimum_chunks
+        self._chunks = []                               # chunks of the current phrase
+
+    def feed(self, power:int, chunk=None) -> list|None:
+        """give the power of the next chunk (and the chunk itself, if the phrase audio is wanted), and get back the list of the phrase's chunks if one just ended"""
+        if power > self.threshold:
+            self._chunks.append(chunk)
+        elif power < self.threshold and self._chunks:
+            phrase = self._chunks
+            self._chunks = []                           # regardless of whether the phrase was long enough, start again
+            if len(phrase) >= self.minimum_chunks:
+                phrase.append(chunk)
+                return phrase
+        return None
+
+    def feed_chunk(self, chunk:bytes) -> bytes|None:
+        """give the next chunk of int16 audio data, and get back the joined audio data of the phrase if one just ended"""
+        phrase = self.feed(get_audio_power(np.frombuffer(chunk, dtype="int16")), chunk)
+        if phrase:
+            return b''.join(phrase)
+        return None
+
+def count_phrases(chunk_powers, threshold:int=AUDIO_THRESHOLD, minimum_chunks:int=round(MINIMUM_PHRASE_LENGTH * CHUNKS_PER_SECOND)) -> int:
+    """count the phrases in a sequence of chunk powers (see `PhraseDetector`)"""
+    detector = PhraseDetector(threshold, minimum_chunks)
+    return sum(1 for power in chunk_powers if detector.feed(power) is not None)
+
+#-------------------------------
+# reading wav files
+
+def _read_wav_header(filepath:str) -> dict:
+    """read the RIFF chunks of a wav file to get its format, and the byte offset and size of its audio data"""
+    with open(filepath, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError("not a RIFF/WAVE file")
+        info = {}
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("no data chunk found")
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                audio_format, channels, sample_rate, _, _, bit_depth = struct.unpack('<HHIIHH', fmt[:16])
+                if audio_format == 0xFFFE and len(fmt) >= 26:     # WAVE_FORMAT_EXTENSIBLE - the real format is the start of the sub-format GUID
+                    audio_format = struct.unpack('<H', fmt[24:26])[0]
+                info.update(audio_format=audio_format, channels=channels, sample_rate=sample_rate, bit_depth=bit_depth)
+                f.seek(chunk_size % 2, 1)                       # chunks are padded to an even size
+            elif chunk_id == b'data':
+                if not info:
+                    raise ValueError("data chunk comes before fmt chunk")
+                file_size = path.getsize(filepath)
+                info['data_offset'] = f.tell()
+                info['data_size'] = min(chunk_size, file_size - f.tell())   # (recordings that were cut off can have a wrong size)
+                return info
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)
+
+def _iter_blocks(filepath:str, info:dict, block_frames:int):
+    """
+    Memory-map the audio data, and yield it in blocks of `(samples, n_clipped)`:
+    - `samples` - a float32 array scaled to the int16 range
+    - `n_clipped` - number of samples at the format's own smallest or largest value (counted before scaling, so 8 bit audio clips at both ends)
+    """
+    audio_format, bit_depth, channels = info['audio_format'], info['bit_depth'], info['channels']
+    width = bit_depth // 8
+    n_samples = info['data_size'] // width // channels * channels
+    if not n_samples:
+        return
+    unpack = None
+    zero = 0                                                            # value of silence, for unsigned formats
+    if audio_format == 3 and bit_depth in (32, 64):                     # float
+        data = np.memmap(filepath, dtype=f'<f{width}', mode='r', offset=info['data_offset'], shape=(n_samples,))
+        lo, hi, scale = -1.0, 1.0, 32768
+    elif audio_format == 1 and bit_depth == 8:                          # 8 bit wav files are unsigned
+        data = np.memmap(filepath, dtype=np.uint8, mode='r', offset=info['data_offset'], shape=(n_samples,))
+        lo, hi, zero, scale = 0, 255, 128, 256
+    elif audio_format == 1 and bit_depth in (16, 32):
+        data = np.memmap(filepath, dtype=f'<i{width}', mode='r', offset=info['data_offset'], shape=(n_samples,))
+        lo, hi, scale = np.iinfo(data.dtype).min, np.iinfo(data.dtype).max, 2.0 ** (16 - bit_depth)
+    elif audio_format == 1 and bit_depth == 24:                         # no 24 bit dtype, so put the 3 bytes of each sample together
+        data = np.memmap(filepath, dtype=np.uint8, mode='r', offset=info['data_offset'], shape=(n_samples, 3))
+        def unpack(block):
+            block = block.astype(np.int32)
+            values = block[:, 0] | (block[:, 1] << 8) | (block[:, 2] << 16)
+            return np.where(values >= 1 << 23, values - (1 << 24), values)
+        lo, hi, scale = -(1 << 23), (1 << 23) - 1, 1 / 256
+    else:
+        raise ValueError(f"unsupported wav format (format {audio_format}, {bit_depth} bit)")
+    block_samples = block_frames * channels
+    for start in range(0, n_samples, block_samples):
+        block = data[start:start + block_samples]
+        if unpack:
+            block = unpack(block)
+        n_clipped = int(np.count_nonzero((block <= lo) | (block >= hi)))
+        samples = block.astype(np.float32)
+        if zero:
+            samples -= zero
+        samples *= scale
+        yield samples, n_clipped
+
+#-------------------------------
+# analysis
+
+def analyse_wav_file(filepath:str, threshold:int=AUDIO_THRESHOLD, minimum_phrase_length:float=MINIMUM_PHRASE_LENGTH) -> dict:
+    """
+    Analyse one wav file, and return a dict of:
+    - `'duration'` (seconds), `'sample_rate'`, `'channels'`, `'bit_depth'`
+    - `'peak_dbfs'`, `'rms_dbfs'` - peak and RMS level, in dB relative to full scale
+    - `'clipped_samples'` - number of samples at full scale
+    - `'silence_ratio'` - fraction of chunks (`1/CHUNKS_PER_SECOND` seconds each) with an audio power below `threshold`
+    - `'speech_segments'` - number of phrases, detected the same way as `SpeechProcessor`
+    - `'error'` - `None`, or a description of the problem if the file couldn't be analysed
+    """
+    result = dict.fromkeys(FIELDS)
+    result['file'] = filepath
+    try:
+        info = _read_wav_header(filepath)
+        rate, channels = info['sample_rate'], info['channels']
+        result.update(sample_rate=rate, channels=channels, bit_depth=info['bit_depth'])
+        chunk_frames = max(1, round(rate / CHUNKS_PER_SECOND))
+        block_frames = chunk_frames * max(1, round(BLOCK_SECONDS * CHUNKS_PER_SECOND))   # blocks are a whole number of chunks
+        n_samples = 0
+        sum_squares = 0.0
+        peak = 0.0
+        n_clipped = 0
+        powers = []
+        for block, block_clipped in _iter_blocks(filepath, info, block_frames):
+            n_samples += len(block)
+            sum_squares += float(np.dot(block, block.astype(np.float64)))
+            peak = max(peak, float(np.max(np.abs(block))))
+            n_clipped += block_clipped
+            # power of each chunk, all at once
+            n_chunks = -(-len(block) // (chunk_frames * channels))
+            padded = np.pad(block, (0, n_chunks * chunk_frames * channels - len(block)), mode='edge')
+            chunks = padded.reshape(n_chunks, -1)
+            powers.extend(get_audio_power(chunks, axis=1).tolist())
+        result['duration'] = n_samples / channels / rate
+        result['peak_dbfs'] = 20 * log10(peak / 32768) if peak else None
+        rms = sqrt(sum_squares / n_samples) if n_samples else 0
+        result['rms_dbfs'] = 20 * log10(rms / 32768) if rms else None
+        result['clipped_samples'] = n_clipped
+        result['silence_ratio'] = sum(1 for p in powers if p < threshold) / len(powers) if powers else None
+        result['speech_segments'] = count_phrases(powers, threshold, round(minimum_phrase_length * CHUNKS_PER_SECOND))
+    except (OSError, ValueError, struct.error) as e:
+        result['error'] = str(e) or type(e).__name__
+    return result
+
+def find_wav_files(dir_paths:list, recursive:bool=False) -> list[str]:
+    """get the paths of all `.wav` files in the directories/folders given"""
+    filepaths = []
+    for dir_path in dir_paths:
+        if recursive:
+            for root, _, files in walk(dir_path):
+                filepaths.extend(path.join(root, f) for f in sorted(files) if f.lower().endswith('.wav'))
+        else:
+            filepaths.extend(path.join(dir_path, f) for f in sorted(listdir(dir_path)) if f.lower().endswith('.wav'))
+    return filepaths
+
+def analyse_wav_files(filepaths:list, workers:int=None, threshold:int=AUDIO_THRESHOLD):
+    """analyse many wav files across a pool of processes, and yield each result (in the same order as `filepaths`)"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(analyse_wav_file, filepaths, [threshold] * len(filepaths), chunksize=8)
+
+#-------------------------------
+# command line interface
+
+def main():
+    parser = argparse.ArgumentParser(description="analyse directories of wav files")
+    parser.add_argument('dirs', nargs='+', help="directories/folders to scan for wav files")
+    parser.add_argument('-o', '--output', help="file to write results to (.csv for CSV, anything else for JSON Lines), default is JSON Lines to stdout")
+    parser.add_argument('-r', '--recursive', action='store_true', help="also scan sub-directories/folders")
+    parser.add_argument('-w', '--workers', type=int, help="number of processes (default is the number of CPUs)")
+    parser.add_argument('--threshold', type=int, default=AUDIO_THRESHOLD, help="audio power threshold for silence and speech detection")
+    args = parser.parse_args()
+
+    filepaths = find_wav_files(args.dirs, args.recursive)
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        as_csv = bool(args.output) and args.output.lower().endswith('.csv')
+        if as_csv:
+            writer = csv.DictWriter(out, fieldnames=FIELDS)
+            writer.writeheader()
+        for result in analyse_wav_files(filepaths, args.workers, args.threshold):
+            if as_csv:
+                writer.writerow(result)
+            else:
+                out.write(json.dumps(result) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+A publish/subscribe audio bus, so that one recording can be used by any number of consumers at once (ex: writing to disk, metering, and transcribing),
+including consumers in other processes.
+
+Audio is written once into a ring buffer in shared memory (`multiprocessing.shared_memory`), and each subscriber has its own read cursor,
+getting zero-copy memoryviews of the shared buffer. The bus never waits for subscribers, so if one falls more than a whole buffer behind,
+the audio it missed is skipped and counted as an overrun.
+
+Usage:
+- `bus = AudioBus(seconds, sample_rate, n_channels, sample_width)` then `bus.connect(rec)` to feed it from a `RecAudio` recorder
+- `reader = AudioBusReader(bus.name)` in any process, then `for view in reader.read(): ...`
+"""
+
+from multiprocessing import shared_memory, resource_tracker
+from threading import Lock
+from time import monotonic, sleep
+import struct
+
+_HEADER = struct.Struct('<QQIHH')                   # write position (total bytes ever written), capacity, sample rate, channels, sample width
+_HEADER_SIZE = 64                                   # header is padded, so the ring buffer starts on a cache line
+
+_register_lock = Lock()                             # held while `resource_tracker.register` is swapped out, and while creating shared memory
+
+def _attach_shared_memory(name:str) -> shared_memory.SharedMemory:
+    """attach to existing shared memory, without registering it with the resource tracker (only the creator should, so only it unlinks the memory)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)      # (Python 3.13+)
+    except TypeError:
+        pass
+    # before 3.13, attaching always registers the memory, and unregistering afterwards would also remove the creator's registration
+    # if this process shares its resource tracker (ex: started with `multiprocessing`), so stop it registering in the first place
+    with _register_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+class AudioBus:
+    """
+    The publishing side of the bus, which creates the shared memory (only one process should publish).
+    - `seconds` - how much audio the ring buffer holds (so how far behind a subscriber can fall before it overruns)
+    - `sample_width` - number of bytes per sample (ex: `2` for 16 bit)
+    - `name` - name of the shared memory block (a random one is made if not given), pass `bus.name` to `AudioBusReader` to subscribe
+    """
+    def __init__(self, seconds:float=10, sample_rate:int=44100, n_channels:int=1, sample_width:int=2, name:str=None):
+        frame_size = n_channels * sample_width
+        self.capacity = max(1, int(seconds * sample_rate)) * frame_size     # (a whole number of frames, so frames never get split by the wrap)
+        with _register_lock:                            # (so the creator's registration can't be swallowed by a reader attaching at the same time)
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_SIZE + self.capacity)
+        self.name = self._shm.name
+        self._ring = self._shm.buf[_HEADER_SIZE:]
+        self._write_pos = 0
+        self._params = (sample_rate, n_channels, sample_width)
+        _HEADER.pack_into(self._shm.buf, 0, 0, self.capacity, *self._params)
+
+    def publish(self, chunk:bytes):
+        """write a chunk of audio data into the ring buffer (this never blocks)"""
+        chunk = memoryview(chunk).cast('B')
+        if len(chunk) > self.capacity:                  # only the end of a chunk bigger than the whole buffer could be kept anyway
+            self._write_pos += len(chunk) - self.capacity
+            chunk = chunk[-self.capacity:]
+        start = self._write_pos % self.capacity
+        first = min(len(chunk), self.capacity - start)
+        self._ring[start:start + first] = chunk[:first]
+        self._ring[:len(chunk) - first] = chunk[first:]
+        self._write_pos += len(chunk)
+        # the write position is only updated after the data is in place, so readers never see data that isn't written yet
+        struct.pack_into('<Q', self._shm.buf, 0, self._write_pos)
+
+    def connect(self, recorder):
+        """feed the bus from a `RecAudio` recorder, by making `publish` its recording callback"""
+        recorder.set_callback(self.publish)
+
+    def close(self):
+        """close and remove the shared memory (subscribers should be closed first)"""
+        self._ring.release()
+        self._shm.close()
+        self._shm.unlink()
+
+class AudioBusReader:
+    """
+    A subscriber to an `AudioBus`, which can be in any process. It starts reading from the newest audio.
+
+    The memoryviews returned by `read()` point straight into the shared ring buffer, so they are only valid until the publisher laps them.
+    Use them (or copy them) straight away, and check `still_valid()` afterwards if it matters whether they were overwritten while being used.
+    All views must be released (or deleted) before `close()` is called.
+    """
+    def __init__(self, name:str):
+        self._shm = _attach_shared_memory(name)
+        _, self.capacity, self.sample_rate, self.n_channels, self.sample_width = _HEADER.unpack_from(self._shm.buf, 0)
+        self._ring = self._shm.buf[_HEADER_SIZE:_HEADER_SIZE + self.capacity]
+        self._cursor = self._get_write_pos()
+        self._last_read_start = self._cursor
+        self.overruns = 0                               # number of times this reader fell too far behind
+        self.overrun_bytes = 0                          # total bytes of audio missed because of overruns
+
+    def _get_write_pos(self) -> int:
+        return struct.unpack_from('<Q', self._shm.buf, 0)[0]
+
+    def available(self) -> int:
+        """number of bytes written since the last read"""
+        return self._get_write_pos() - self._cursor
+
+    def read(self, max_bytes:int=None, timeout:float=0) -> list[memoryview]:
+        """
+        Get all the audio written since the last read (up to `max_bytes`), as a list of zero-copy memoryviews
+        (two views if the data wraps around the end of the ring buffer, otherwise one, or none if there's nothing new).
+        - `timeout` - if there's nothing new, keep checking for up to this many seconds (`None` to wait forever)
+        """
+        write_pos = self._get_write_pos()
+        if write_pos == self._cursor and timeout != 0:
+            poll_interval = 0.01
+            deadline = None if timeout is None else monotonic() + timeout
+            while write_pos == self._cursor and (deadline is None or monotonic() < deadline):
+                sleep(poll_interval)
+                write_pos = self._get_write_pos()
+        if write_pos - self._cursor > self.capacity:    # overrun - skip ahead to the oldest audio still in the buffer
+            missed = write_pos - self.capacity - self._cursor
+            self.overruns += 1
+            self.overrun_bytes += missed
+            self._cursor += missed
+        end = write_pos if max_bytes is None else min(write_pos, self._cursor + max_bytes)
+        frame_size = self.n_channels * self.sample_width
+        end -= (end - self._cursor) % frame_size        # only return whole frames
+        start = self._cursor % self.capacity
+        n_bytes = end - self._cursor
+        first = min(n_bytes, self.capacity - start)
+        views = [self._ring[start:start + first]] if first else []
+        if n_bytes > first:
+            views.append(self._ring[:n_bytes - first])
+        self._last_read_start = self._cursor
+        self._cursor = end
+        return views
+
+    def still_valid(self) -> bool:
+        """return `True` if the data from the last `read()` hasn't been overwritten by the publisher yet"""
+        return self._get_write_pos() - self._last_read_start <= self.capacity
+
+    def close(self):
+        """stop reading from the bus (doesn't affect the publisher or other readers)"""
+        self._ring.release()
+        self._shm.close()
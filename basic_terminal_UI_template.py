@@ -1,37 +1,141 @@
 """
-A basic terminal input loop
+A basic terminal input loop, which doesn't block background work
+
+`Shell` reads input on its own thread, and handles typed commands, background results, and timer callbacks all in one event loop,
+so anything happening in the background (ex: speech phrases, timers, tone playback) can be handled and shown straight away,
+instead of waiting for the user to press enter. The loop blocks on a queue while idle, so it uses no CPU while waiting.
 """
 
+from threading import Thread, Event
+from queue import Queue
+from bisect import bisect_left
+from traceback import print_exc
+from time_tools import Timer
+
 HELP_MESSAGE = """
 ...
 """
 
+class Shell:
+    """
+    Register commands with `add_command()` (or the `command()` decorator), then call `run()` to start the loop.
+    - commands can be typed as any unambiguous prefix of their name (ex: `he` for `help`)
+    - everything after the command name is passed to its function as a single string
+    - `post()`, `watch()`, and `call_later()` let background work run code in the loop
+    """
+    def __init__(self, prompt:str="\nType here: ", help_message:str=HELP_MESSAGE):
+        self.prompt = prompt
+        self._commands = {}                             # name -> (function, help text)
+        self._names = []                                # sorted command names, for prefix matching
+        self._events = Queue()                          # (function, args) to be called in the loop
+        self._ready_for_input = Event()                 # set when the input thread should show the prompt again
+        self._running = False
+        self.add_command('help', lambda args: print(help_message + self.get_commands_help()), "show this message")
+        self.add_command('exit', lambda args: self.stop(), "exit")
+
+    #----- Commands -----#
+
+    def add_command(self, name:str, func, help:str=''):
+        """add a command, `func` must accept the rest of the typed line (a string) as its only argument"""
+        if not name in self._commands:
+            self._names.insert(bisect_left(self._names, name), name)
+        self._commands[name] = (func, help)
+
+    def command(self, name:str, help:str=''):
+        """decorator version of `add_command()`"""
+        def decorator(func):
+            self.add_command(name, func, help)
+            return func
+        return decorator
+
+    def find_commands(self, prefix:str) -> list[str]:
+        """return the names of all commands starting with `prefix` (or just the command name, if `prefix` matches one exactly)"""
+        if prefix in self._commands:
+            return [prefix]
+        i = bisect_left(self._names, prefix)
+        matches = []
+        while i < len(self._names) and self._names[i].startswith(prefix):
+            matches.append(self._names[i])
+            i += 1
+        return matches
+
+    def get_commands_help(self) -> str:
+        """get a string listing all commands and their help text"""
+        width = max(len(name) for name in self._names) + 4
+        return '\n'.join(f"{name:<{width}}{self._commands[name][1]}" for name in self._names)
+
+    def _handle_input(self, line:str):
+        try:
+            name, _, args = line.strip().partition(' ')
+            if not name:
+                return
+            matches = self.find_commands(name)
+            if len(matches) == 1:
+                self._commands[matches[0]][0](args.strip())
+            elif matches:
+                print(f"'{name}' could be: {', '.join(matches)}")
+            else:
+                print(f"unknown command '{name}' (type 'help' to see all commands)")
+        finally:
+            if self._running:
+                self._ready_for_input.set()             # ready for the next line, even if the command failed
+
+    #----- Background Work -----#
+
+    def post(self, func, *args):
+        """call `func(*args)` in the loop, can be called from any thread"""
+        self._events.put((func, args))
+
+    def watch(self, get_func, handler):
+        """
+        Keep calling `get_func()` on a background thread (it should block until it has something, ex: `SpeechProcessor.get_phrase`),
+        and call `handler` with each result in the loop
+        """
+        def watcher():
+            while True:
+                result = get_func()
+                if result is not None:
+                    self.post(handler, result)
+        Thread(target=watcher, daemon=True).start()
+
+    def call_later(self, delay:float, func, *args) -> Timer:
+        """call `func(*args)` in the loop after `delay` seconds, and return the started `Timer` (which can be stopped)"""
+        timer = Timer(delay, self.post, func, *args)
+        timer.start()
+        return timer
+
+    #----- Loop -----#
+
+    def _read_input(self):
+        while self._running:
+            self._ready_for_input.wait()                # don't show the prompt until the last command was handled
+            self._ready_for_input.clear()
+            try:
+                line = input(self.prompt)
+            except EOFError:
+                self.post(self.stop)
+                return
+            self.post(self._handle_input, line)
+
+    def run(self):
+        """start reading input and handling events (this blocks until `stop()` is called, or 'exit' is typed)"""
+        self._running = True
+        self._ready_for_input.set()
+        Thread(target=self._read_input, daemon=True).start()
+        while self._running:
+            func, args = self._events.get()
+            try:
+                func(*args)
+            except Exception:
+                print_exc()                             # keep the loop running if a command or background handler fails
+
+    def stop(self):
+        """stop the loop (can be called from any thread)"""
+        self._running = False
+        self.post(lambda: None)                         # wake up the loop, in case it's waiting
+
 def main_loop():
-    while True:
-        i = input("\nType here: ")
-        if i == '0':
-            pass
-        elif i == '1':
-            pass
-        elif i == '2':
-            pass
-        elif i == '3':
-            pass
-        elif i == '4':
-            pass
-        elif i == '5':
-            pass
-        elif i == '6':
-            pass
-        elif i == '7':
-            pass
-        elif i == '8':
-            pass
-        elif i == '9':
-            pass
-        elif i == 'help':
-            print(HELP_MESSAGE)
-        elif i == "exit":
-            break
-        else:
-            pass
\ No newline at end of file
+    shell = Shell()
+    for i in range(10):
+        shell.add_command(str(i), lambda args: None)
+    shell.run()
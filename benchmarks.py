@@ -0,0 +1,136 @@
+"""
+Benchmark suites for the hot paths in this repo, and a command line interface for running and comparing them (uses `testing_tools`)
+
+Usage:
+- `python benchmarks.py run [--suite NAME ...] [--save FILE] [--memory]` - run benchmarks, and optionally save the results as a JSON baseline
+- `python benchmarks.py compare BASELINE CURRENT` - compare two saved results, exits with code 1 if there are any significant regressions
+"""
+
+import argparse
+import random
+import sys
+from testing_tools import run_benchmarks, save_results, load_results, compare_results, format_ns
+
+#-------------------------------
+# suites
+# each suite function returns a dict of benchmark names and functions (which take no arguments)
+
+def tone_suite() -> dict:
+    """tone generation (`ToneMaker._generate_tone_data`)"""
+    from tone_maker import ToneMaker
+    tm = ToneMaker.__new__(ToneMaker)               # skip `__init__`, so that PyAudio doesn't need an audio device
+    tm.set_audio_params()
+    benchmarks = {}
+    for shape in ('SQUARE', 'SAW', 'TRIANGLE'):
+        benchmarks[f'tone.{shape.lower()}_1024'] = lambda shape=shape: tm._generate_tone_data(440, shape, 1024, 17)   # one callback buffer
+    benchmarks['tone.square_1s'] = lambda: tm._generate_tone_data(440, 'SQUARE', 44100)                               # one second (like `write_wav_file`)
+    return benchmarks
+
+def phrase_suite() -> dict:
+    """phrase detection (`SpeechProcessor.__detect_phrase`, which hands each chunk to `audio_analysis.PhraseDetector`)"""
+    # (`speech_proc` can't be imported here - it uses package-relative imports, and loads the transcription models and PyAudio -
+    # so this benchmarks the detector it delegates to, along with the same queue put)
+    import numpy as np
+    from queue import Queue
+    from audio_analysis import PhraseDetector, AUDIO_THRESHOLD, MINIMUM_PHRASE_LENGTH, CHUNKS_PER_SECOND
+    detector = PhraseDetector(AUDIO_THRESHOLD, round(MINIMUM_PHRASE_LENGTH * CHUNKS_PER_SECOND))
+    audio_q = Queue()
+    rng = np.random.default_rng(0)
+    chunk_size = round(16000 / CHUNKS_PER_SECOND)
+    quiet = [(rng.normal(0, 50, chunk_size)).astype(np.int16).tobytes() for _ in range(10)]
+    loud = [(rng.normal(0, 3000, chunk_size)).astype(np.int16).tobytes() for _ in range(10)]
+    chunks = (quiet + loud) * 5                     # 20 seconds of audio, with phrases in it
+
+    def detect_all():
+        for chunk in chunks:
+            phrase_audio_data = detector.feed_chunk(chunk)
+            if phrase_audio_data:
+                audio_q.put(phrase_audio_data)
+        audio_q.queue.clear()
+    return {'phrase.detect_20s': detect_all}
+
+def text_suite() -> dict:
+    """text diffing and rendering (`string_tools`)"""
+    import string_tools
+    rnd = random.Random(0)
+    lines = [''.join(rnd.choice('abcdefghij ') for _ in range(rnd.randint(0, 80))) for _ in range(500)]
+    original = '\n'.join(lines)
+    modified = '\n'.join(line.upper() if i % 7 == 0 else line for i, line in enumerate(lines))
+    return {
+        'text.highlight_changes_500': lambda: string_tools.highlight_line_changes_simple(original, modified),
+        'text.box_text_500': lambda: string_tools.box_text(modified)
+    }
+
+def flatten_suite() -> dict:
+    """flattening nested iterables (`iterable_tools.flatten_generator`)"""
+    from iterable_tools import flatten_generator
+    wide = [[x, (x, x + 1), [x, [x]]] for x in range(1000)]
+    deep = 0
+    for x in range(200):
+        deep = [x, deep]
+    return {
+        'flatten.wide_1000': lambda: list(flatten_generator(wide)),
+        'flatten.deep_200': lambda: list(flatten_generator(deep))
+    }
+
+SUITES = {
+    'tone':     tone_suite,
+    'phrase':   phrase_suite,
+    'text':     text_suite,
+    'flatten':  flatten_suite
+}
+
+#-------------------------------
+# command line interface
+
+def run(args):
+    benchmarks = {}
+    for suite in args.suite or SUITES:
+        try:
+            benchmarks.update(SUITES[suite]())
+        except ModuleNotFoundError as e:            # (only a missing dependency skips a suite, any other import problem is a real error)
+            print(f"skipping '{suite}' suite (missing module '{e.name}')")
+    results = run_benchmarks(benchmarks, repeats=args.repeats, min_time=args.min_time, trace_memory=args.memory, disable_gc=not args.keep_gc)
+    for name, result in results['results'].items():
+        line = f"{name:<30} median {format_ns(result['median']):>10}   iqr {format_ns(result['iqr']):>10}   min {format_ns(result['min']):>10}"
+        if result['peak_memory'] is not None:
+            line += f"   peak memory {result['peak_memory'] / 1024:.1f} KiB"
+        print(line)
+    if args.save:
+        save_results(results, args.save)
+        print(f"\nsaved results to {args.save}")
+
+def compare(args) -> int:
+    comparisons = compare_results(load_results(args.baseline), load_results(args.current), args.threshold, args.alpha)
+    for c in comparisons:
+        print(f"{c['name']:<30} {c['change']:>+8.1%}   p={c['p_value']:.3f}   {c['status']}")
+    n_regressions = sum(1 for c in comparisons if c['status'] == 'REGRESSION')
+    print(f"\n{n_regressions} significant regression(s)")
+    return 1 if n_regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="run and compare benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="run benchmarks")
+    run_parser.add_argument('--suite', action='append', choices=SUITES, help="suite to run (can be given more than once, default is all)")
+    run_parser.add_argument('--save', help="JSON file to save the results to")
+    run_parser.add_argument('--repeats', type=int, default=7)
+    run_parser.add_argument('--min-time', type=float, default=0.1, help="minimum seconds per repeat, used to calibrate the number of loops")
+    run_parser.add_argument('--memory', action='store_true', help="also measure peak memory with tracemalloc")
+    run_parser.add_argument('--keep-gc', action='store_true', help="leave the garbage collector enabled while timing")
+
+    compare_parser = subparsers.add_parser('compare', help="compare two saved results")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.05, help="minimum relative change in median time to flag (default 5%%)")
+    compare_parser.add_argument('--alpha', type=float, default=0.05, help="significance level for the Mann-Whitney U test")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == '__main__':
+    main()
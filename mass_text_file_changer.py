@@ -4,7 +4,9 @@ A function which provides a simple terminal interface for making mass changes to
 
 from os import listdir, path
 import string_tools, print_tools
+from profiling_tools import probe
 
+@probe('change_all_text_files')
 def change_all_text_files(dir_path:str, modifier_func, confirm:bool=True):
     """A simple terminal interface for making mass changes to a directory/folder of text files.
     - provide a directory/folder path to `dir_path`
@@ -8,6 +8,10 @@ Two classes that uses the Pyaduio module to start, pause, and stop audio playing
 import pyaudio
 import wave
 from time import sleep
+try:
+    from .profiling_tools import probe
+except ImportError:
+    from profiling_tools import probe
 
 pa = pyaudio.PyAudio()                      # instantiate PyAudio
 
@@ -73,6 +77,7 @@ class PlayAudio(_BaseAudio):
         framerate = self.file.getframerate()
         n_frames = self.file.getnframes()
 
+        @probe('PlayAudio.callback')
         def callback(in_data, frame_count, time_info, status):
             data = self.file.readframes(frame_count)
             return (data, pyaudio.paContinue)
@@ -172,6 +177,7 @@ class RecAudio(_BaseAudio):
         """
         self.stop()                         # if there is already an open stream, close it first
 
+        @probe('RecAudio.callback')
         def callback(in_data, frame_count, time_info, status):
             # if a callback function was given (`set_callback()`), then call that,
             # otherwise just append audio data (in_data) to `audio_frames`
@@ -0,0 +1,196 @@
+"""
+Low-overhead profiling probes, for counting calls and timing code while it's actually running (ex: inside audio callbacks),
+without the overhead of a full profiler like cProfile.
+
+Probes are off by default. When disabled, a probe costs one global lookup and one function call.
+When enabled, each thread records its own counters and timing histograms (so no locks are needed), which are merged when dumped.
+
+Usage:
+- `@probe('name')` - decorate a function to count and time its calls
+- `with probe('name'):` - count and time a block of code
+- `enable()` / `disable()` - turn all probes on or off
+- `dump()` - get the collected stats as text or JSON (or `enable(dump_at_exit=...)` to write them to a file when Python exits)
+"""
+
+from time import perf_counter_ns
+from functools import wraps
+import threading
+import atexit
+import json
+
+_HIST_SIZE = 65                                     # histogram bucket `b` counts durations from 2^(b-1) to 2^b nanoseconds
+
+_enabled = False
+_probes = {}                                        # name -> Probe
+_thread_stats = []                                  # (thread, stats dict) for every live thread that has recorded anything
+_retired_stats = {}                                 # stats merged from threads that have finished (so their entries can be dropped)
+_merge_lock = threading.Lock()                      # (only used when merging/resetting, never while recording)
+_local = threading.local()
+
+def _get_thread_stats() -> dict:
+    """get the stats dict for the current thread (name -> [count, total ns, max ns, histogram])"""
+    try:
+        return _local.stats
+    except AttributeError:
+        stats = _local.stats = {}
+        _thread_stats.append((threading.current_thread(), stats))          # (list.append is atomic, so no lock needed)
+        return stats
+
+class Probe:
+    """A named probe, which can be used as a decorator or context manager. Get one with `probe(name)`."""
+    __slots__ = ('name',)
+
+    def __init__(self, name:str):
+        self.name = name
+
+    def _record(self, elapsed:int):
+        stats = _get_thread_stats()
+        s = stats.get(self.name)
+        if s is None:
+            s = stats[self.name] = [0, 0, 0, [0] * _HIST_SIZE]
+        s[0] += 1
+        s[1] += elapsed
+        if elapsed > s[2]:
+            s[2] = elapsed
+        s[3][elapsed.bit_length()] += 1
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            t1 = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._record(perf_counter_ns() - t1)
+        return wrapper
+
+    def __enter__(self):
+        start = perf_counter_ns() if _enabled else None     # (`None` marks a block entered while disabled, so nested blocks still pair up)
+        try:
+            _local.starts.append(start)
+        except AttributeError:
+            _local.starts = [start]
+        return self
+
+    def __exit__(self, *exc):
+        start = _local.starts.pop()
+        if start is not None:
+            self._record(perf_counter_ns() - start)
+
+def probe(name:str) -> Probe:
+    """get the probe called `name` (it's created if it doesn't exist yet)"""
+    p = _probes.get(name)
+    if p is None:
+        p = _probes.setdefault(name, Probe(name))
+    return p
+
+#-------------------------------
+# turning probes on and off
+
+def enable(dump_at_exit:str=None):
+    """
+    Turn on all probes.
+    - `dump_at_exit` - path of a file to write the stats to when Python exits (as JSON if it ends with `.json`, otherwise as text)
+    """
+    global _enabled
+    _enabled = True
+    if dump_at_exit:
+        frmt = 'json' if dump_at_exit.endswith('.json') else 'text'
+        atexit.register(dump, frmt, dump_at_exit)
+
+def disable():
+    """turn off all probes (the stats collected so far are kept)"""
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def reset():
+    """clear all stats collected so far"""
+    with _merge_lock:
+        _retire_dead_threads()
+        _retired_stats.clear()
+        for _, stats in list(_thread_stats):
+            stats.clear()
+
+#-------------------------------
+# getting the stats
+
+def _merge_stats(merged:dict, stats:dict):
+    """add one thread's stats into `merged`"""
+    for name, (count, total, max_ns, hist) in list(stats.items()):
+        m = merged.get(name)
+        if m is None:
+            merged[name] = [count, total, max_ns, list(hist)]
+        else:
+            m[0] += count
+            m[1] += total
+            m[2] = max(m[2], max_ns)
+            m[3] = [a + b for a, b in zip(m[3], hist)]
+
+def _retire_dead_threads():
+    """fold the stats of finished threads into `_retired_stats` and drop their entries, so threads coming and going don't use more and more memory"""
+    for entry in list(_thread_stats):
+        thread, stats = entry
+        if not thread.is_alive():
+            _merge_stats(_retired_stats, stats)
+            _thread_stats.remove(entry)             # (in place, so entries appended by new threads meanwhile aren't lost)
+
+def _hist_percentile(hist:list, count:int, fraction:float) -> int:
+    """get the upper bound (in nanoseconds) of the histogram bucket containing the given percentile"""
+    target = count * fraction
+    running = 0
+    for b, n in enumerate(hist):
+        running += n
+        if running >= target:
+            return 2 ** b
+    return 2 ** (len(hist) - 1)
+
+def get_stats() -> dict:
+    """
+    Get the stats for every probe, merged across all threads, as a dict of probe names and dicts of:
+    - `'calls'`, `'total_ns'`, `'mean_ns'`, `'max_ns'`
+    - `'p50_ns'`, `'p99_ns'` - approximate percentiles (rounded up to a power of 2, but never more than `'max_ns'`) from the timing histogram
+    - `'histogram'` - a dict of bucket upper bounds (in nanoseconds) and counts, for the non-empty buckets
+    """
+    merged = {}
+    with _merge_lock:
+        _retire_dead_threads()
+        _merge_stats(merged, _retired_stats)
+        for _, stats in list(_thread_stats):
+            _merge_stats(merged, stats)
+    return {
+        name: {
+            'calls':        count,
+            'total_ns':     total,
+            'mean_ns':      total / count if count else 0,
+            'max_ns':       max_ns,
+            'p50_ns':       min(_hist_percentile(hist, count, 0.5), max_ns),
+            'p99_ns':       min(_hist_percentile(hist, count, 0.99), max_ns),
+            'histogram':    {2 ** b: n for b, n in enumerate(hist) if n}
+        }
+        for name, (count, total, max_ns, hist) in sorted(merged.items())
+    }
+
+def dump(frmt:str='text', filepath:str=None) -> str:
+    """
+    Get the stats for every probe as a string of a text table (`frmt='text'`) or JSON (`frmt='json'`),
+    and also write it to `filepath` if given.
+    """
+    stats = get_stats()
+    if frmt == 'json':
+        output = json.dumps(stats, indent=1)
+    elif frmt == 'text':
+        lines = [f"{'probe':<40}{'calls':>10}{'total ms':>12}{'mean us':>12}{'p50 us':>10}{'p99 us':>10}{'max us':>10}"]
+        for name, s in stats.items():
+            lines.append(f"{name:<40}{s['calls']:>10}{s['total_ns']/1e6:>12.3f}{s['mean_ns']/1e3:>12.3f}{s['p50_ns']/1e3:>10.1f}{s['p99_ns']/1e3:>10.1f}{s['max_ns']/1e3:>10.1f}")
+        output = '\n'.join(lines)
+    else:
+        raise ValueError("`frmt` must be string of 'text' or 'json'")
+    if filepath:
+        with open(filepath, 'w') as f:
+            f.write(output)
+    return output
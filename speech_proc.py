@@ -5,6 +5,8 @@ from queue import Queue
 from vosk import Model, KaldiRecognizer, SetLogLevel
 from faster_whisper import WhisperModel
 from .play_rec_audio import RecAudio
+from .profiling_tools import probe
+from .audio_analysis import PhraseDetector, AUDIO_THRESHOLD, MINIMUM_PHRASE_LENGTH, CHUNKS_PER_SECOND
 
 #-------------
 
@@ -70,13 +72,13 @@ class SpeechProcessor:
         self._sample_rate = 16000
         self._sample_width = 16
         self._n_channels = 1
-        self._chunks_per_second = 5
+        self._chunks_per_second = CHUNKS_PER_SECOND
         self._chunk = round(self._sample_rate/self._chunks_per_second)
         self._rec.set_pars(self._chunk, self._n_channels, self._sample_rate)    # set the recorder's audio parameters
         #-- Phrase Detection --#
-        self._audio_threshold = 675                             # value from 0-65535 (65535 is the max possible value for int16 array (unbalanced) of audio data) 
-        self._minimum_phrase_length = 0.3                       # in seconds
-        self._phrase_chunks = []                                # holds the recorded audio data chunks which are above the threshold
+        self._audio_threshold = AUDIO_THRESHOLD                 # value from 0-65535 (65535 is the max possible value for int16 array (unbalanced) of audio data) 
+        self._minimum_phrase_length = MINIMUM_PHRASE_LENGTH     # in seconds
+        self._phrase_detector = PhraseDetector(self._audio_threshold, round(self._minimum_phrase_length * self._chunks_per_second))
         self._audio_q = Queue()                                 # holds audio data for phrases, ready for transcription
         #-- Transcribers --#
         self._limited_vocab_transcriber = _VoskT()              # the limited vobcabulary transcriber
@@ -84,28 +86,12 @@ class SpeechProcessor:
 
     #----- Phrase Capture Support Methods -----#
 
-    def __get_audio_power(self, data):
-        data_array = np.frombuffer(data, dtype="int16")
-        sample_value_range = abs(int(np.max(data_array)) - int(np.min(data_array)))
-        # mean_sample_value = mean(abs(audio_data_array))
-        return sample_value_range
-
+    @probe('SpeechProcessor.__detect_phrase')
     def __detect_phrase(self, chunk:bytes):
-        audio_power = self.__get_audio_power(chunk)
-        minimum_chunks = round(self._minimum_phrase_length * self._chunks_per_second)
-
-        if audio_power > self._audio_threshold:
-            self._phrase_chunks.append(chunk)
-        
-        elif audio_power < self._audio_threshold and self._phrase_chunks:
-            if len(self._phrase_chunks) >= minimum_chunks:
-                self._phrase_chunks.append(chunk)
-                phrase_audio_data = b''.join(self._phrase_chunks)
-                # put audio into queue
-                self._audio_q.put(phrase_audio_data)
-
-            # regardless of above condition, clear phrase_chunks
-            self._phrase_chunks.clear()
+        phrase_audio_data = self._phrase_detector.feed_chunk(chunk)
+        if phrase_audio_data:
+            # put audio into queue
+            self._audio_q.put(phrase_audio_data)
 
     #----- Phrase Capture Accessbile Methods -----#
 
@@ -149,6 +135,7 @@ class SpeechProcessor:
     
     #----- Phrase Transcription Methods -----#
 
+    @probe('SpeechProcessor.transcribe')
     def transcribe(self, audio_data:bytes, vocabulary:str='') -> str:
         """Transcribe phrase audio data into text.
         `vocabulary` must be a single string, with the words separated by whitespace.
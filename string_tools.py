@@ -3,7 +3,12 @@ Miscellaneous functions for manipulating strings and/or making them easier to lo
 """
 
 from colorama import Back, Fore
+try:
+    from .profiling_tools import probe
+except ImportError:
+    from profiling_tools import probe
 
+@probe('string_tools.box_text')
 def box_text(text:str):
     """Add a box around text! Can be single or multiline string.
     
@@ -24,6 +29,7 @@ def box_text(text:str):
     boxed_text += BL_CORNER + (H_LINE * max_length) + BR_CORNER + '\n'  # add the bottom of the box
     return boxed_text
 
+@probe('string_tools.get_clean_keyvalue_spacing')
 def get_clean_keyvalue_spacing(key:str, val:str, margin:int=30) ->int:
     """Get a string of a key and value with consistent spacing, for cleaner, easy to read printing.
     
@@ -51,6 +57,7 @@ def get_clean_keyvalue_spacing(key:str, val:str, margin:int=30) ->int:
         return complete_str.removesuffix('\n')                                              # return complete string with last added line-break removed
     return key + after_key_space + val
 
+@probe('string_tools.highlight_line_changes_simple')
 def highlight_line_changes_simple(original:str, modified:str) -> tuple:
     """supply an original mutli-line string, and a modified version of that string, and get back the modifed text with the parts that are different highlighted"""
     highlighted_modified = [] 
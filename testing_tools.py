@@ -1,8 +1,15 @@
 """
-Functions for testing functions
+Functions for testing functions, and benchmarking them properly
 """
 
-from time import time
+from time import time, perf_counter_ns
+from statistics import median, quantiles
+from datetime import datetime, timezone
+from math import erf, sqrt
+import gc
+import json
+import platform
+import tracemalloc
 
 def get_func_execution_time(n:int, func, *args):
     """
@@ -10,9 +17,182 @@ def get_func_execution_time(n:int, func, *args):
     - `func` - function/method to test
     - `args` - arguments to pass to the test function/method
     - `n` - number of times to execute
+
+    (this is only good for a rough idea, use `benchmark()` to get results that can actually be compared)
     """
     t1 = time()
     for x in range(n):
         func(*args)
     t2 = time()
-    return t2 - t1
\ No newline at end of file
+    return t2 - t1
+
+#-------------------------------
+# benchmark harness
+
+def _time_loops(func, args:tuple, loops:int) -> int:
+    """return the total time (in nanoseconds) it takes to call `func` `loops` times"""
+    loop_range = range(loops)
+    t1 = perf_counter_ns()
+    for _ in loop_range:
+        func(*args)
+    return perf_counter_ns() - t1
+
+def _calibrate_loops(func, args:tuple, min_time:float) -> int:
+    """find the number of loops needed for one repeat to take at least `min_time` seconds"""
+    min_ns = min_time * 1e9
+    loops = 1
+    while True:
+        elapsed = _time_loops(func, args, loops)
+        if elapsed >= min_ns:
+            return loops
+        # estimate the loops needed from how long this took, but never grow by more than 10x at once
+        estimate = int(loops * min_ns / elapsed * 1.2) if elapsed else loops * 10
+        loops = max(loops * 2, min(estimate, loops * 10))
+
+def benchmark(func, *args, repeats:int=7, min_time:float=0.1, warmup:int=1, loops:int=None, trace_memory:bool=False, disable_gc:bool=True) -> dict:
+    """
+    Benchmark a function, and return a dict of the results (all times are in nanoseconds per call):
+    - `'loops'` - number of calls timed together in each repeat
+    - `'times'` - time per call for each repeat
+    - `'median'`, `'iqr'` (inter-quartile range), `'min'`
+    - `'peak_memory'` - peak memory (in bytes) allocated during one call (only if `trace_memory` is True, otherwise `None`)
+
+    Arguments:
+    - `func` - function/method to test
+    - `args` - arguments to pass to the test function/method
+    - `repeats` - number of times to repeat the timing
+    - `min_time` - if `loops` isn't given, it's calibrated so that each repeat takes at least this many seconds
+    - `warmup` - number of extra repeats to run (and throw away) before timing
+    - `trace_memory` - measure peak memory of a call with `tracemalloc` (this is done in a separate call, so it doesn't slow down the timing)
+    - `disable_gc` - turn off the garbage collector while timing, so that collections don't add noise
+    """
+    gc_was_enabled = gc.isenabled()
+    if disable_gc:
+        gc.disable()
+    try:
+        if loops is None:
+            loops = _calibrate_loops(func, args, min_time)
+        for _ in range(warmup):
+            _time_loops(func, args, loops)
+        times = [_time_loops(func, args, loops) / loops for _ in range(repeats)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    peak_memory = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            func(*args)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    if len(times) > 1:
+        q1, _, q3 = quantiles(times, n=4, method='inclusive')
+    else:
+        q1 = q3 = times[0]
+    return {
+        'loops':        loops,
+        'times':        times,
+        'median':       median(times),
+        'iqr':          q3 - q1,
+        'min':          min(times),
+        'peak_memory':  peak_memory
+    }
+
+def run_benchmarks(benchmarks:dict, **kwargs) -> dict:
+    """
+    Run every benchmark in `benchmarks` (a dict of names and functions which take no arguments),
+    and return a dict of the results, which can be saved as a JSON baseline with `save_results()`.
+    - `kwargs` are passed on to `benchmark()`
+    """
+    results = {}
+    for name, func in benchmarks.items():
+        results[name] = benchmark(func, **kwargs)
+    return {
+        'meta': {
+            'date':     datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python':   platform.python_version(),
+            'platform': platform.platform()
+        },
+        'results': results
+    }
+
+def save_results(results:dict, filepath:str):
+    """save results from `run_benchmarks()` to a JSON file"""
+    with open(filepath, 'w') as f:
+        json.dump(results, f, indent=1)
+
+def load_results(filepath:str) -> dict:
+    """load results saved with `save_results()`"""
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+#-------------------------------
+# comparing results
+
+def _mann_whitney_p(a:list, b:list) -> float:
+    """
+    Get the (two-sided) p-value of the Mann-Whitney U test for two samples,
+    which is the probability of seeing a difference this big if both samples came from the same distribution.
+    Uses the normal approximation (with a tie correction), which is good enough for the number of repeats used in benchmarks.
+    """
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0
+    # rank all the values together (tied values share the average of their ranks)
+    values = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    rank_sum = 0.0
+    tie_sum = 0
+    i = 0
+    while i < len(values):
+        j = i
+        while j + 1 < len(values) and values[j + 1][0] == values[i][0]:
+            j += 1
+        avg_rank = (i + j) / 2 + 1
+        rank_sum += avg_rank * sum(1 for k in range(i, j + 1) if values[k][1] == 0)
+        n_tied = j - i + 1
+        tie_sum += n_tied ** 3 - n_tied
+        i = j + 1
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_sum / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / sqrt(variance)     # (with continuity correction)
+    return max(0.0, min(1.0, 1 - erf(max(z, 0) / sqrt(2))))
+
+def compare_results(baseline:dict, current:dict, threshold:float=0.05, alpha:float=0.05) -> list[dict]:
+    """
+    Compare two sets of results from `run_benchmarks()`, and return a list of dicts (one for each benchmark in both):
+    - `'name'`
+    - `'change'` - relative change in median time (ex: `0.1` means 10% slower)
+    - `'p_value'` - from a Mann-Whitney U test of the repeat times
+    - `'status'` - `'REGRESSION'` or `'IMPROVEMENT'` if the change is bigger than `threshold` *and* statistically significant (`p_value` < `alpha`),
+    otherwise `'SAME'`
+    """
+    comparisons = []
+    for name, base in baseline['results'].items():
+        cur = current['results'].get(name)
+        if cur is None:
+            continue
+        change = cur['median'] / base['median'] - 1 if base['median'] else 0.0
+        p_value = _mann_whitney_p(base['times'], cur['times'])
+        status = 'SAME'
+        if p_value < alpha and abs(change) > threshold:
+            status = 'REGRESSION' if change > 0 else 'IMPROVEMENT'
+        comparisons.append({
+            'name':     name,
+            'change':   change,
+            'p_value':  p_value,
+            'status':   status
+        })
+    return comparisons
+
+def format_ns(ns:float) -> str:
+    """get a string of a time in nanoseconds, in the most readable unit"""
+    for unit, size in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= size:
+            return f"{ns / size:.3g} {unit}"
+    return f"{ns:.3g} ns"
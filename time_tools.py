@@ -3,8 +3,18 @@ Various tools I made related to time keeping, and to more easily use Python's `d
 """
 
 from datetime import datetime, timezone
-from time import time
-from threading import Thread, Event
+from time import monotonic_ns
+from math import sqrt
+from threading import Thread, Condition
+from heapq import heappush, heappop, heapify
+from itertools import count
+from traceback import print_exc
+from functools import lru_cache
+import re
+try:
+    import numpy as np
+except ImportError:                 # numpy is only needed for formatting `datetime64` arrays
+    np = None
 
 #-------------------------------
 # time string formats
@@ -56,6 +66,318 @@ def get_current_local_date_str() -> str:
     """returns a string containing the current local date"""
     return datetime.strftime(datetime.now(), STRF_WDY_MNT_DY)
 
+#-------------------------------
+# bulk datetime-string functions
+
+_2_DIGITS = tuple(f'{n:02}' for n in range(60))
+_AM_PM = (datetime(2000, 1, 1, 0).strftime("%p"), datetime(2000, 1, 1, 12).strftime("%p"))   # use strftime to get these, so they match the current locale
+_UNIX_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+_FORMAT_DIRECTIVES = 'YmdBbAaHIp'               # rendered by strftime once per hour
+_MINUTE_SECOND_DIRECTIVES = 'MS'                # filled in for every timestamp from a lookup table
+
+@lru_cache
+def _compile_format(frmt:str):
+    """
+    Split a format string into an "hour template" and a lookup table for the minutes and seconds,
+    so that strftime only needs to be used once for every hour of timestamps.
+
+    The hour template is a strftime format with `%M` and `%S` swapped for `%%s`, so when a date and hour is formatted with it,
+    the result is an old-style `%` format string that just needs the minute/second strings filled in.
+    The table has one tuple of minute/second strings for every second of an hour.
+    Returns `None` if `frmt` has any directive that isn't supported here.
+    """
+    template = ''
+    directives = []
+    i = 0
+    while i < len(frmt):
+        char = frmt[i]
+        if char != '%':
+            template += char
+            i += 1
+            continue
+        directive = frmt[i+1:i+2]
+        if directive and directive in _MINUTE_SECOND_DIRECTIVES:
+            template += '%%s'
+            directives.append(directive)
+        elif directive == '%':
+            template += '%%%%'                      # strftime turns this into `%%`, which the final `%` formatting turns into `%`
+        elif directive and directive in _FORMAT_DIRECTIVES:
+            template += '%' + directive
+        else:
+            return None
+        i += 2
+    table = [tuple(_2_DIGITS[m] if d == 'M' else _2_DIGITS[s] for d in directives) for m in range(60) for s in range(60)]
+    return template, table
+
+def _format_all(compiled:tuple, hour_keys, secs_of_hour) -> list[str]:
+    """format each timestamp, given as the number of hours since 0001-01-01 and the second within that hour"""
+    template, table = compiled
+    hours = {}                                      # hour key -> hour template for that hour
+    strings = []
+    append = strings.append
+    for key, sec in zip(hour_keys, secs_of_hour):
+        hour_str = hours.get(key)
+        if hour_str is None:
+            ordinal, hour = divmod(key, 24)
+            hour_str = hours[key] = datetime.fromordinal(ordinal).replace(hour=hour).strftime(template)
+        append(hour_str % table[sec])
+    return strings
+
+def _get_converter(convert_to:str|None):
+    if convert_to is None:
+        return None
+    if convert_to == 'LOCAL':
+        return convert_datetime_to_local
+    if convert_to == 'UTC':
+        return convert_datetime_to_utc
+    raise ValueError("`convert_to` must be `None`, or string of 'LOCAL' or 'UTC'")
+
+def _get_local_offsets(secs):
+    """get the local UTC offset (in seconds) for each value in an array of unix times (in seconds)"""
+    # the offset only ever changes on a quarter hour, so only look it up once for each quarter hour in the array
+    quarters, inverse = np.unique(secs // 900, return_inverse=True)
+    offsets = np.array([datetime.fromtimestamp(q * 900, timezone.utc).astimezone().utcoffset().total_seconds() for q in quarters.tolist()], dtype=np.int64)
+    return offsets[inverse.reshape(-1)]
+
+def format_datetimes_to_strings(dts, frmt:str, convert_to:str|None=None) -> list[str]:
+    """
+    Format many timestamps at once with the same format (ex: one of the `STRF_*` formats), much faster than calling `strftime` on each one.
+    - `dts` can be any sequence of `datetime` objects, or a NumPy `datetime64` array
+        - NumPy `datetime64` values are treated as UTC times (which is how NumPy treats them), and `NaT` values become `'NaT'`
+    - `convert_to` can be `'LOCAL'` or `'UTC'` to first convert each timestamp the same way as `convert_datetime_to_local`/`convert_datetime_to_utc`
+    """
+    converter = _get_converter(convert_to)
+    compiled = _compile_format(frmt)
+    is_dt64 = np is not None and isinstance(dts, np.ndarray) and np.issubdtype(dts.dtype, np.datetime64)
+    if compiled is None:
+        # not a format that can be done in bulk, so just use strftime for each timestamp
+        if is_dt64:
+            dts = [datetime.fromtimestamp(int(s), timezone.utc) for s in dts.astype('datetime64[s]').astype(np.int64)]
+        if converter:
+            dts = (converter(dt) for dt in dts)
+        return [format_datetime_to_string(dt, frmt) for dt in dts]
+
+    if not is_dt64:
+        dts = [converter(dt) for dt in dts] if converter else list(dts)
+        return _format_all(compiled, [dt.toordinal() * 24 + dt.hour for dt in dts], [dt.minute * 60 + dt.second for dt in dts])
+
+    # NumPy array - extract all the fields at once with integer maths
+    dts = dts.reshape(-1)
+    is_nat = np.isnat(dts)
+    secs = dts.astype('datetime64[s]').astype(np.int64)
+    secs[is_nat] = 0
+    if convert_to == 'LOCAL':
+        secs = secs + _get_local_offsets(secs)
+    hours, secs_of_hour = np.divmod(secs, 3600)
+    strings = _format_all(compiled, (hours + _UNIX_EPOCH_ORDINAL * 24).tolist(), secs_of_hour.tolist())
+    if is_nat.any():
+        for i in np.flatnonzero(is_nat).tolist():
+            strings[i] = 'NaT'
+    return strings
+
+@lru_cache
+def _compile_parse_format(frmt:str):
+    """
+    Turn a format string into a regex, along with which regex groups belong to the date, and which belong to the time.
+    Returns `None` if `frmt` has any directive that isn't supported here.
+    """
+    # use strftime to get names, so they match the current locale (the same as strptime)
+    names = {
+        'B': [datetime(2000, m, 1).strftime('%B') for m in range(1, 13)],
+        'b': [datetime(2000, m, 1).strftime('%b') for m in range(1, 13)],
+        'A': [datetime(2000, 1, d).strftime('%A') for d in range(3, 10)],
+        'a': [datetime(2000, 1, d).strftime('%a') for d in range(3, 10)],
+        'p': list(_AM_PM)
+    }
+    pattern = ''
+    date_groups = []                                # (directive, group number)
+    time_groups = []
+    i = 0
+    while i < len(frmt):
+        char = frmt[i]
+        if char != '%':
+            pattern += r'\s+' if char.isspace() else re.escape(char)
+            i += 1
+            continue
+        directive = frmt[i+1:i+2]
+        if directive == '%':
+            pattern += '%'
+            i += 2
+            continue
+        if directive == 'Y':
+            pattern += r'(\d{4})'
+        elif directive in ('m', 'd', 'H', 'I', 'M', 'S'):
+            pattern += r'(\d{1,2})'
+        elif directive in names:
+            pattern += '(' + '|'.join(re.escape(n) for n in names[directive]) + ')'
+        else:
+            return None
+        group = len(date_groups) + len(time_groups) + 1
+        (time_groups if directive in 'HIMSp' else date_groups).append((directive, group))
+        i += 2
+    regex = re.compile(pattern, re.IGNORECASE)
+    month_names = {n.lower(): m for m, n in enumerate(names['B'], 1)} | {n.lower(): m for m, n in enumerate(names['b'], 1)}
+    return regex, tuple(date_groups), tuple(time_groups), month_names, names['p'][1].lower()
+
+def parse_strings_to_datetimes(strings, frmt:str, convert_to:str|None=None) -> list[datetime]:
+    """
+    Parse many strings at once with the same format (ex: one of the `STRF_*` formats) into `datetime` objects,
+    giving the same results as calling `datetime.strptime` on each one, but much faster.
+    - `convert_to` can be `'LOCAL'` or `'UTC'` to convert each parsed (naive, so treated as local) datetime
+    the same way as `convert_datetime_to_local`/`convert_datetime_to_utc`
+    """
+    converter = _get_converter(convert_to)
+    compiled = _compile_parse_format(frmt)
+    if compiled is None:
+        dts = (datetime.strptime(s, frmt) for s in strings)
+        return [converter(dt) for dt in dts] if converter else list(dts)
+
+    regex, date_groups, time_groups, month_names, pm = compiled
+    date_cache = {}                                 # date strings -> (year, month, day)
+    time_cache = {}                                 # time strings -> (hour, minute, second)
+
+    def parse_date(values:tuple) -> tuple:
+        fields = {'Y': 1900, 'm': 1, 'd': 1}        # same defaults as strptime
+        for (directive, _), value in zip(date_groups, values):
+            if directive in ('B', 'b'):
+                fields['m'] = month_names[value.lower()]
+            elif directive in ('Y', 'm', 'd'):
+                fields[directive] = int(value)
+        datetime(fields['Y'], fields['m'], fields['d'])     # make sure it's a real date (raises `ValueError` if not)
+        return fields['Y'], fields['m'], fields['d']
+
+    def parse_time(values:tuple) -> tuple:
+        fields = {'H': 0, 'M': 0, 'S': 0}
+        hour_12 = is_pm = None
+        for (directive, _), value in zip(time_groups, values):
+            if directive == 'I':
+                hour_12 = int(value)
+                if not 1 <= hour_12 <= 12:
+                    raise ValueError(f"hour {value!r} is not a valid 12 hour clock hour")
+            elif directive == 'p':
+                is_pm = value.lower() == pm
+            else:
+                fields[directive] = int(value)
+        if hour_12 is not None:
+            fields['H'] = hour_12 % 12 + (12 if is_pm else 0)
+        return fields['H'], fields['M'], fields['S']
+
+    date_idx = tuple(g for _, g in date_groups)
+    time_idx = tuple(g for _, g in time_groups)
+    dts = []
+    for s in strings:
+        match = regex.fullmatch(s)
+        if not match:
+            raise ValueError(f"time data {s!r} does not match format {frmt!r}")
+        groups = match.groups()
+        date_key = tuple(groups[i-1] for i in date_idx)
+        date = date_cache.get(date_key)
+        if date is None:
+            date = date_cache[date_key] = parse_date(date_key)
+        time_key = tuple(groups[i-1] for i in time_idx)
+        time = time_cache.get(time_key)
+        if time is None:
+            time = time_cache[time_key] = parse_time(time_key)
+        dt = datetime(*date, *time)
+        dts.append(converter(dt) if converter else dt)
+    return dts
+
+#-------------------------------
+# timer scheduler
+
+class _TimerScheduler:
+    """
+    A single background thread which fires the callbacks of every `Timer`.
+
+    Pending timers are kept in a min-heap of `[deadline, seq, timer]` entries, ordered by deadline.
+    Deadlines are `time.monotonic_ns()` values, so changes to the system clock never make timers fire early or late.
+    Starting a timer pushes a new entry (O(log n)), and stopping/restarting one just marks its old entry as dead (O(1)),
+    dead entries are then thrown away when they reach the top of the heap, or when they make up most of the heap.
+    The thread is only started once the first timer is started, and sleeps on a condition until the earliest deadline.
+    """
+    def __init__(self):
+        self._heap = []                                     # heap of `[deadline, seq, timer]` entries (timer is `None` once an entry is dead)
+        self._n_dead = 0                                    # number of dead entries still in the heap
+        self._seq = count()                                 # tie-breaker, so entries with equal deadlines never compare their timers
+        self._cond = Condition()
+        self._thread = None
+        self.executor = None                                # default executor for callbacks (`None` means call them in the scheduler thread)
+
+    def schedule(self, timer, deadline:int):
+        """(re)schedule `timer` to fire at `deadline`, replacing any entry it already has"""
+        with self._cond:
+            self._kill(timer)
+            entry = self._push(timer, deadline)
+            if self._thread is None:
+                self._thread = Thread(target=self._main_loop, daemon=True)
+                self._thread.start()
+            if self._heap[0] is entry:                      # only wake the thread if the earliest deadline changed
+                self._cond.notify()
+
+    def cancel(self, timer):
+        """stop `timer` from firing"""
+        with self._cond:
+            self._kill(timer)
+
+    def _push(self, timer, deadline:int) -> list:
+        """push a new heap entry for `timer` (must be called while holding `self._cond`)"""
+        entry = [deadline, next(self._seq), timer]
+        timer._entry = entry
+        heappush(self._heap, entry)
+        return entry
+
+    def _kill(self, timer):
+        """mark the timer's heap entry as dead (must be called while holding `self._cond`)"""
+        entry = timer._entry
+        if entry is None:
+            return
+        entry[2] = None
+        timer._entry = None
+        self._n_dead += 1
+        if self._n_dead > 64 and self._n_dead > len(self._heap) // 2:
+            # too many dead entries, so rebuild the heap without them
+            self._heap = [e for e in self._heap if e[2] is not None]
+            heapify(self._heap)
+            self._n_dead = 0
+
+    def _main_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    while self._heap and self._heap[0][2] is None:     # throw away any dead entries at the top
+                        heappop(self._heap)
+                        self._n_dead -= 1
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    now = monotonic_ns()
+                    delay = self._heap[0][0] - now
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay / 1e9)
+                deadline, _, timer = heappop(self._heap)
+                timer._entry = None                         # timer is no longer active once it fires...
+                try:
+                    next_deadline = timer._next_deadline(deadline, now)
+                except Exception:
+                    print_exc()                             # drop the timer, rather than take down the thread every other timer runs on
+                    continue
+                if next_deadline is not None:               # ...unless it repeats, in which case it gets rescheduled right away
+                    self._push(timer, next_deadline)
+            try:
+                timer._dispatch()
+            except Exception:
+                print_exc()                                 # a failing callback shouldn't take down every other timer
+
+_scheduler = _TimerScheduler()
+
+def set_timer_executor(executor):
+    """
+    Set the default executor (ex: a `concurrent.futures.ThreadPoolExecutor`) that `Timer` callbacks are submitted to.
+    If `executor` is `None`, callbacks are called directly in the shared scheduler thread, so they should be quick.
+    """
+    _scheduler.executor = executor
+
 #-------------------------------
 # timer class
 
@@ -63,37 +385,135 @@ class Timer:
     """
     Call a function after a specified timeout in seconds.
 
-    This will start a new thread if the timer has not been started, 
-    but if a timer is restarted while still active, 
-    the previous thread will be kept alive and only the delay timeout will be reset.
-    This way, a new thread is only spawned when needed.
+    All timers share a single scheduler thread, so having many timers doesn't mean having many threads.
+    Restarting a timer while it is still active just resets its timeout.
+    If `executor` is given, the function is submitted to it instead of being called in the scheduler thread (see `set_timer_executor`).
     """
-    def __init__(self, timeout:int, func, *args):
+    def __init__(self, timeout:int, func, *args, executor=None):
         self._timeout = timeout
         self._func = func
         self._args = args
-        self._target = time()
-        self._t = Event()
-        self.stop()
-
-    def _main_func(self):
-        self._t.clear()
-        while self.is_active():
-            self._t.wait(self._target - time())
-            if time() >= self._target and self.is_active():
-                self._func(*self._args)
-                self.stop()
+        self._executor = executor
+        self._entry = None                                  # current heap entry in the scheduler (`None` if not active)
+
+    def _next_deadline(self, deadline:int, now:int):
+        """called by the scheduler when the timer fires, return the next deadline (or `None` for a one-shot timer)"""
+        return None
+
+    def _dispatch(self):
+        executor = self._executor or _scheduler.executor
+        if executor:
+            executor.submit(self._func, *self._args)
+        else:
+            self._func(*self._args)
 
     def start(self):
         "start the timer"
-        self._target = time() + self._timeout
-        if not self.is_active():
-            Thread(target=self._main_func, daemon=True).start()
+        _scheduler.schedule(self, monotonic_ns() + int(self._timeout * 1e9))
     
     def stop(self):
         "stop and reset the timer"
-        self._t.set()
+        if self._entry is not None:
+            _scheduler.cancel(self)
 
     def is_active(self):
         "return `True` if timer is active, and `False` is not"
-        return not self._t.is_set()
+        return self._entry is not None
+
+#-------------------------------
+# repeating timer class
+
+class RepeatingTimer(Timer):
+    """
+    Call a function every `interval` seconds, until stopped.
+
+    Each call is scheduled against an absolute deadline (start time + n * interval),
+    so small delays don't add up over thousands of periods.
+    `policy` decides what happens when the timer falls behind by more than a whole period (ex: the callback took too long):
+    - `'SKIP'` - skip the missed periods and carry on from the next deadline that's still in the future
+    - `'CATCH_UP'` - fire once for every missed period, back-to-back, until caught up
+
+    Lateness (how long after its deadline each call was fired) is recorded, see `get_stats()`.
+    """
+    def __init__(self, interval:float, func, *args, policy:str='SKIP', executor=None):
+        if not policy in ('SKIP', 'CATCH_UP'):
+            raise ValueError("`policy` must be string of 'SKIP' or 'CATCH_UP'")
+        super().__init__(interval, func, *args, executor=executor)
+        self._period = int(interval * 1e9)
+        if self._period <= 0:
+            raise ValueError("`interval` must be at least 1 nanosecond")
+        self._policy = policy
+        self.reset_stats()
+
+    def _next_deadline(self, deadline:int, now:int) -> int:
+        # record lateness (Welford's algorithm, so the mean and variance are updated without storing every value)
+        lateness = now - deadline
+        self._n_fired += 1
+        delta = lateness - self._late_mean
+        self._late_mean += delta / self._n_fired
+        self._late_m2 += delta * (lateness - self._late_mean)
+        self._late_min = min(self._late_min, lateness)
+        self._late_max = max(self._late_max, lateness)
+        # determine next deadline
+        next_deadline = deadline + self._period
+        if self._policy == 'SKIP' and next_deadline <= now:
+            n_missed = (now - deadline) // self._period     # number of whole periods that have already gone by
+            self._n_skipped += n_missed
+            next_deadline += n_missed * self._period
+        return next_deadline
+
+    def reset_stats(self):
+        "reset the lateness and jitter statistics"
+        self._n_fired = 0
+        self._n_skipped = 0
+        self._late_mean = 0.0
+        self._late_m2 = 0.0
+        self._late_min = float('inf')
+        self._late_max = 0
+
+    def get_stats(self) -> dict:
+        """
+        Return a dict of statistics about how punctually the timer has been firing (all times are in seconds):
+        - `'fired'` - number of times the timer has fired
+        - `'skipped'` - number of periods skipped because the timer fell behind (only with the `'SKIP'` policy)
+        - `'late_min'`, `'late_mean'`, `'late_max'` - how long after its deadline the timer fired
+        - `'jitter'` - standard deviation of the lateness
+        """
+        n = self._n_fired
+        return {
+            'fired':        n,
+            'skipped':      self._n_skipped,
+            'late_min':     self._late_min / 1e9 if n else 0.0,
+            'late_mean':    self._late_mean / 1e9,
+            'late_max':     self._late_max / 1e9,
+            'jitter':       sqrt(self._late_m2 / n) / 1e9 if n else 0.0
+        }
+
+def every(interval:float, func, *args, policy:str='SKIP', executor=None) -> RepeatingTimer:
+    """start calling `func` every `interval` seconds, and return the `RepeatingTimer` (call its `stop()` method to stop it)"""
+    timer = RepeatingTimer(interval, func, *args, policy=policy, executor=executor)
+    timer.start()
+    return timer
+
+#-------------------------------
+
+if __name__ == '__main__':
+    # benchmark the bulk datetime-string functions against a plain strftime/strptime loop
+    from datetime import timedelta
+    from testing_tools import get_func_execution_time
+
+    n = 200_000
+    dts = [datetime(2024, 1, 1) + timedelta(milliseconds=50 * i) for i in range(n)]   # timestamps like a busy log would have
+    for frmt in (STRF_YR__SEC_H24, STRF_YR__MIN_H12, STRF_HR_MIN_H12):
+        strings = [format_datetime_to_string(dt, frmt) for dt in dts]
+        loop_fmt = get_func_execution_time(1, lambda: [format_datetime_to_string(dt, frmt) for dt in dts])
+        bulk_fmt = get_func_execution_time(1, format_datetimes_to_strings, dts, frmt)
+        loop_parse = get_func_execution_time(1, lambda: [datetime.strptime(s, frmt) for s in strings])
+        bulk_parse = get_func_execution_time(1, parse_strings_to_datetimes, strings, frmt)
+        print(f"{frmt!r} ({n} timestamps):")
+        print(f"    format: {loop_fmt:.3f}s per-item -> {bulk_fmt:.3f}s bulk ({loop_fmt / bulk_fmt:.1f}x)")
+        print(f"    parse:  {loop_parse:.3f}s per-item -> {bulk_parse:.3f}s bulk ({loop_parse / bulk_parse:.1f}x)")
+        if np is not None:
+            array = np.array(dts, dtype='datetime64[ms]')
+            bulk_np = get_func_execution_time(1, format_datetimes_to_strings, array, frmt)
+            print(f"    format (datetime64 array): {bulk_np:.3f}s ({loop_fmt / bulk_np:.1f}x)")
@@ -1,4 +1,14 @@
+"""
+Tools to make using tkinter easier: window geometry helpers, and a live audio meter widget
+"""
+
 import tkinter as tk
+from collections import deque
+from math import log10
+try:
+    import numpy as np
+except ImportError:                 # numpy is only needed for `AudioMeter`
+    np = None
 
 def center_window(window_object:tk.Tk, width:int, height:int):
     # get dimensions of computer screen
@@ -38,3 +48,127 @@ def set_geometry_sensibly(window_object:tk.Tk, percentage:int):
     window_object.geometry(f'{width}x{height}+{center_x}+{center_y}')
     # set minimum height and width of window to be 25% of screen's height and width
     window_object.minsize(int(screen_width*0.25), int(screen_height*0.25))
+
+
+#-------------------------------
+# audio meter widget
+
+def _decimate(samples, samps_per_col:int):
+    """split `samples` into columns of `samps_per_col` samples, and return the min and max of each column, along with any leftover samples"""
+    n_cols = len(samples) // samps_per_col
+    used = n_cols * samps_per_col
+    columns = samples[:used].reshape(n_cols, samps_per_col)
+    return columns.min(axis=1), columns.max(axis=1), samples[used:]
+
+class AudioMeter(tk.Canvas):
+    """
+    A canvas showing a scrolling waveform of live audio, along with a level meter (RMS bar and a peak hold line).
+
+    Call `push(chunk)` with audio data from any thread (ex: from a `RecAudio` callback). Chunks are handed over through a bounded deque,
+    so pushing never blocks, and if the UI falls behind, the oldest chunks are dropped.
+    The canvas is redrawn at most `fps` times a second (using `after()`), and only if new audio has come in.
+    Audio is decimated to the min and max sample of each pixel column, and the same canvas items are moved each redraw instead of being recreated.
+
+    - `sample_rate` - sample rate of the pushed audio
+    - `window` - number of seconds of audio shown across the waveform
+    - `dtype` - NumPy dtype of the samples in pushed chunks (integer types are scaled to their full range)
+    - `channels` - number of interleaved channels in pushed chunks (only the first channel is shown)
+    """
+    METER_WIDTH = 12                                # width (in pixels) of the level meter, on the right side of the waveform
+    FLOOR_DB = -60                                  # lowest level shown on the meter (dBFS)
+
+    def __init__(self, master, width:int=300, height:int=80, sample_rate:int=44100, window:float=2.0, fps:int=30, dtype='int16', channels:int=1,
+                 wave_color:str='#4caf50', meter_color:str='#8bc34a', peak_color:str='#f44336', background:str='black', max_chunks:int=64, **kwargs):
+        if np is None:
+            raise ImportError("`AudioMeter` needs numpy")
+        super().__init__(master, width=width, height=height, background=background, highlightthickness=0, **kwargs)
+        self._sample_rate = sample_rate
+        self._window = window
+        self._interval = max(1, int(1000 / fps))
+        self._dtype = np.dtype(dtype)
+        self._scale, self._offset = 1.0, 0.0
+        if self._dtype.kind == 'i':
+            self._scale = float(np.iinfo(self._dtype).max + 1)
+        elif self._dtype.kind == 'u':                                       # unsigned samples are centered on half their range
+            self._scale = self._offset = (np.iinfo(self._dtype).max + 1) / 2
+        self._channels = channels
+        self._chunks = deque(maxlen=max_chunks)     # chunks pushed from other threads (appending/popping a deque is thread-safe)
+        self._peak = 0.0                            # peak hold level (0-1)
+
+        self._wave = self.create_line(0, 0, 0, 0, fill=wave_color)
+        self._meter = self.create_rectangle(0, 0, 0, 0, fill=meter_color, width=0)
+        self._peak_line = self.create_line(0, 0, 0, 0, fill=peak_color, width=2)
+        self._resize(width, height)
+        self.bind('<Configure>', lambda event: self._resize(event.width, event.height))
+        self._after_id = self.after(self._interval, self._update)
+
+    def push(self, chunk):
+        """hand over a chunk of audio (bytes or a NumPy array) to be shown, can be called from any thread"""
+        self._chunks.append(chunk)
+
+    def _resize(self, width:int, height:int):
+        """reset the waveform columns to fit the canvas size"""
+        self._width, self._height = width, height
+        self._n_cols = max(1, width - self.METER_WIDTH)
+        self._samps_per_col = max(1, round(self._sample_rate * self._window / self._n_cols))
+        self._mins = np.zeros(self._n_cols, dtype=np.float32)
+        self._maxs = np.zeros(self._n_cols, dtype=np.float32)
+        self._leftover = np.zeros(0, dtype=np.float32)
+        # x coordinates are the same every redraw, so work them out once (each column is drawn as a vertical stroke from its max to its min)
+        self._coords = np.empty(self._n_cols * 4, dtype=np.float32)
+        x = np.arange(self._n_cols, dtype=np.float32)
+        self._coords[0::4] = x
+        self._coords[2::4] = x
+        self._draw_wave()
+
+    def _draw_wave(self):
+        mid = self._height / 2
+        self._coords[1::4] = mid - self._maxs * mid
+        self._coords[3::4] = mid - self._mins * mid
+        self.coords(self._wave, self._coords.tolist())
+
+    def _level_to_y(self, level:float) -> float:
+        """convert a level (0-1) to a y coordinate on the meter, using a dB scale"""
+        db = 20 * log10(level) if level > 0 else self.FLOOR_DB
+        fraction = min(1.0, max(0.0, 1 - db / self.FLOOR_DB))
+        return self._height * (1 - fraction)
+
+    def _update(self):
+        self._after_id = self.after(self._interval, self._update)   # schedule the next update first, so the frame rate stays steady
+        if not self._chunks:
+            return
+        # collect all chunks pushed since the last update
+        arrays = [self._leftover]
+        while self._chunks:
+            chunk = self._chunks.popleft()
+            data = np.frombuffer(chunk, dtype=self._dtype) if isinstance(chunk, (bytes, bytearray, memoryview)) else np.asarray(chunk, dtype=self._dtype).reshape(-1)
+            if self._channels > 1:
+                data = data[::self._channels]
+            arrays.append((data.astype(np.float32) - self._offset) / self._scale)
+        samples = np.concatenate(arrays)
+        new_samples = samples[len(self._leftover):]
+        # add decimated columns to the end of the waveform, scrolling it left
+        mins, maxs, self._leftover = _decimate(samples, self._samps_per_col)
+        n_new = len(mins)
+        if n_new >= self._n_cols:
+            self._mins[:] = mins[-self._n_cols:]
+            self._maxs[:] = maxs[-self._n_cols:]
+        elif n_new:
+            self._mins[:-n_new] = self._mins[n_new:]
+            self._mins[-n_new:] = mins
+            self._maxs[:-n_new] = self._maxs[n_new:]
+            self._maxs[-n_new:] = maxs
+        self._draw_wave()
+        # update level meter and peak hold
+        if len(new_samples):
+            rms = float(np.sqrt(np.mean(np.square(new_samples))))
+            peak = float(np.max(np.abs(new_samples)))
+            self._peak = max(peak, self._peak * 0.95)                   # peak hold slowly falls back down
+            x1 = self._width - self.METER_WIDTH
+            self.coords(self._meter, x1, self._level_to_y(rms), self._width, self._height)
+            peak_y = self._level_to_y(self._peak)
+            self.coords(self._peak_line, x1, peak_y, self._width, peak_y)
+
+    def destroy(self):
+        self.after_cancel(self._after_id)
+        super().destroy()
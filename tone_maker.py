@@ -1,12 +1,80 @@
 """
-A class for generating and playing tones
+A class for generating and playing tones, and sequences of tones
 """
 
-from pyaudio import PyAudio, paContinue, paInt8, paInt16, paInt24, paInt32
+from pyaudio import PyAudio, paContinue, paComplete, paInt8, paInt16, paInt24, paInt32
+from time import sleep
 import wave
 import struct
+import numpy as np
+try:
+    from .profiling_tools import probe
+except ImportError:
+    from profiling_tools import probe
 
 
+#-------------
+# sequencer
+
+class _Sequencer:
+    """
+    Renders a list of tone events into blocks of float samples (from -1 to 1), keeping track of its position between blocks.
+
+    Events are sorted by start sample, and only the events which overlap the block being rendered are looked at,
+    so the cost of rendering grows with the number of samples (and how many tones overlap), not the total number of events.
+    """
+    SHAPES = ('SQUARE', 'SAW', 'TRIANGLE')
+
+    def __init__(self, events:list, sample_rate:int, fade:float):
+        events_in_samples = []
+        for start, duration, freq, shape, gain in events:
+            if not shape in self.SHAPES:
+                raise ValueError("`wave_shape` must be string of 'SQUARE', 'SAW', or 'TRIANGLE'")
+            s_start = round(start * sample_rate)
+            s_end = s_start + round(duration * sample_rate)
+            if s_end > s_start:
+                events_in_samples.append((s_start, s_end, freq / sample_rate, shape, gain))
+        self._events = sorted(events_in_samples, key=lambda e: e[0])
+        self._fade = max(1, round(fade * sample_rate))   # number of samples to fade in and out over (avoids clicks)
+        self._next = 0                                  # index of the next event that hasn't started yet
+        self._active = []                               # events that overlap the current position
+        self.position = 0                               # sample index of the start of the next block
+        self.n_samples = max((e[1] for e in self._events), default=0)
+
+    def is_done(self) -> bool:
+        return self.position >= self.n_samples
+
+    def render(self, n_samps:int):
+        """render the next `n_samps` samples, as a float array"""
+        block_start, block_end = self.position, self.position + n_samps
+        while self._next < len(self._events) and self._events[self._next][0] < block_end:
+            self._active.append(self._events[self._next])
+            self._next += 1
+        block = np.zeros(n_samps)
+        still_active = []
+        for event in self._active:
+            s_start, s_end, cycles_per_samp, shape, gain = event
+            a, b = max(s_start, block_start), min(s_end, block_end)
+            if a < b:
+                n = np.arange(a, b)
+                phase = ((n - s_start) * cycles_per_samp) % 1.0     # phase is worked out from the event's start, so every tone begins on the exact sample
+                if shape == 'SQUARE':
+                    wave_data = np.where(phase < 0.5, 1.0, -1.0)
+                elif shape == 'SAW':
+                    wave_data = phase * 2 - 1
+                else:
+                    wave_data = 1 - 4 * np.abs(phase - 0.5)
+                envelope = np.minimum(1.0, np.minimum(n - s_start + 1, s_end - n) / self._fade)
+                block[a - block_start:b - block_start] += wave_data * envelope * gain
+            if s_end > block_end:
+                still_active.append(event)
+        self._active = still_active
+        self.position = block_end
+        return np.clip(block, -1.0, 1.0)
+
+#-------------
+# main class
+
 class ToneMaker():
     """set tone sound parameters and then generate a wav file of the tone, or play and stop it"""
     def __init__(self):
@@ -31,6 +99,7 @@ class ToneMaker():
     #---------
 
     # THIS GETS INACCURATE AT HIGHER FREQUENCIES, ESPECIALLY AT LOWER SAMPE RATES
+    @probe('ToneMaker._generate_tone_data')
     def _generate_tone_data(self, wave_freq:int, wave_shape:str, n_samps:int, s_offset:int=0):
         """
         Generate `n_samps` samples needed to create a tone (which can be then used to write to a file, or play).
@@ -137,3 +206,62 @@ class ToneMaker():
             return True
         else:
             return False
+
+    #--------- sequences
+
+    def _samples_to_bytes(self, samples, for_wav:bool=False) -> bytes:
+        """convert float samples (from -1 to 1) to bytes in the current bit depth"""
+        max_samp_value = (2 ** self._s_bit)/2 - 1
+        ints = (samples * max_samp_value).astype(np.int32)
+        if self._s_bit == 8:
+            return (ints + 128).astype(np.uint8).tobytes() if for_wav else ints.astype(np.int8).tobytes()     # 8 bit wav files are unsigned
+        if self._s_bit == 16:
+            return ints.astype('<i2').tobytes()
+        if self._s_bit == 24:
+            return ints.astype('<i4').view(np.uint8).reshape(-1, 4)[:, :3].tobytes()    # keep the lower 3 bytes of each sample
+        return ints.astype('<i4').tobytes()
+
+    def play_sequence(self, events:list, fade:float=0.005, wait:bool=False):
+        """
+        Play a sequence of tones in one stream, in a seperate thread (this method is non-blocking, unless `wait` is True).
+        - `events` - list of `(start, duration, wave_freq, wave_shape, gain)` tuples, with times in seconds and gain from 0 to 1
+            - overlapping tones are mixed together
+        - `fade` - seconds to fade each tone in and out over, to avoid clicks
+
+        Every tone starts on the exact sample for its start time, since the whole sequence is rendered inside the stream callback.
+        """
+        self.stop()
+        sequencer = _Sequencer(events, self._s_rate, fade)
+
+        def callback(in_data, frame_count, time_info, status):
+            data = self._samples_to_bytes(sequencer.render(frame_count))
+            return (data, paComplete if sequencer.is_done() else paContinue)
+
+        self._stream = self._pa.open(
+            format = self._pa_frmt,
+            channels = 1,
+            rate = self._s_rate,
+            frames_per_buffer=1024,
+            output = True,
+            stream_callback = callback
+            )
+
+        self._stream.start_stream()
+
+        if wait:
+            sleep(sequencer.n_samples / self._s_rate)
+
+    def write_sequence_wav_file(self, filepath:str, events:list, fade:float=0.005, block_size:int=8192):
+        """
+        Render a sequence of tones (see `play_sequence`) to a wav file.
+        The audio is rendered and written `block_size` samples at a time, so long sequences don't need to fit in memory.
+        """
+        sequencer = _Sequencer(events, self._s_rate, fade)
+
+        with wave.open(filepath, 'w') as file:
+            file.setnchannels(1)
+            file.setsampwidth(self._wav_s_width)
+            file.setframerate(self._s_rate)
+            while not sequencer.is_done():
+                n_samps = min(block_size, sequencer.n_samples - sequencer.position)
+                file.writeframes(self._samples_to_bytes(sequencer.render(n_samps), for_wav=True))